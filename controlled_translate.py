@@ -3,152 +3,166 @@
 Script para traducción controlada y verificada desde subtítulo #211
 """
 
-import re
+import asyncio
 import sys
+from functools import lru_cache
+from typing import List, Optional
 
-def get_subtitle_block_from_en(start_index: int, end_index: int):
-    """Extrae bloques de subtítulos específicos del archivo en.srt"""
-    
-    blocks_to_translate = []
-    
-    with open('en.srt', 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-    
-    if content.startswith('\ufeff'):
-        content = content[1:]
+try:
+    import aiohttp
+except ImportError:  # Sin aiohttp solo se usan las traducciones locales
+    aiohttp = None
+
+from srt_cache import SubFile, load_file
+
+# API gratuita de MyMemory para traducción automática
+_MYMEMORY_URL = 'https://api.mymemory.translated.net/get'
+_MAX_CONCURRENT_REQUESTS = 20
+
+# Prefijo de los textos que quedan pendientes de traducción manual
+_PENDING_MARKER = '[TRADUCIR]: '
+
+# Traducciones ya resueltas por texto original (evita repetir peticiones HTTP)
+_translation_cache = {}
+
+# Lista de traducciones línea por línea basadas en contexto
+# Para casos específicos conocidos que requieren traducción precisa
+_SPECIFIC_TRANSLATIONS = {
+    "about the inner workings\nof the Silk Road and,": "sobre el funcionamiento interno\ndel Silk Road y,",
+    "you know, his own identity,\nof course.": "ya sabes, su propia identidad,\npor supuesto.",
+    "every law enforcement agency\nthat you can imagine.": "toda agencia de aplicación de la ley\nque puedas imaginar.",
+    "is a collaborative effort.": "es un esfuerzo colaborativo.",
+    "come from the community itself.": "vienen de la propia comunidad.",
+    "But he did tell me like\nsome interesting things": "Pero él sí me dijo como\nalgunas cosas interesantes",
+    "and the way that\nthe Silk Road works.": "y la forma en que\nfunciona el Silk Road.",
+    "of anything that's main purpose\nis to harm innocent": "de cualquier cosa cuyo propósito principal\nsea dañar inocentes",
+    "or that it was necessary": "o que fuera necesario",
+    "to harm innocent people\nto bring to market.": "dañar gente inocente\npara llevar al mercado.",
+}
+
+# Claves en minúsculas precalculadas para la búsqueda sin distinción de mayúsculas
+_SPECIFIC_TRANSLATIONS_LOWER = [(eng.lower(), eng, spa) for eng, spa in _SPECIFIC_TRANSLATIONS.items()]
+
+def get_subtitle_block_from_en(start_index: int, end_index: int, en_file: Optional[SubFile] = None):
+    """Extrae bloques de subtítulos específicos del archivo en.srt (o de en_file si ya está cargado)"""
     
-    all_blocks = content.split('\n\n')
+    if en_file is None:
+        en_file = load_file('en.srt')
     
-    for block in all_blocks:
-        if not block.strip():
-            continue
-            
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
-            
-        try:
-            index = int(lines[0])
-            if start_index <= index <= end_index:
-                blocks_to_translate.append((index, block.strip()))
-        except ValueError:
-            continue
-    
-    return sorted(blocks_to_translate, key=lambda x: x[0])
+    # Recorrer el rango por índice ya devuelve los bloques ordenados
+    return [
+        (index, en_file.by_index[index].to_block())
+        for index in range(start_index, end_index + 1)
+        if index in en_file.by_index
+    ]
 
+@lru_cache(maxsize=4096)
 def translate_text(english_text: str) -> str:
-    """Traduce texto específico del inglés al español"""
-    
-    # Diccionario de traducciones comunes para consistencia
-    translations = {
-        "REEVES NARRATING": "REEVES NARRANDO",
-        "MALE NEWSCASTER": "LOCUTOR MASCULINO", 
-        "FEMALE NEWSCASTER": "LOCUTORA FEMENINA",
-        "REPORTER": "REPORTERA",
-        "WOMAN": "MUJER",
-        "MAN": "HOMBRE",
-        "Silk Road": "Silk Road",  # Mantener nombre propio
-        "Bitcoin": "Bitcoin",  # Mantener término técnico
-        "Dread Pirate Roberts": "Dread Pirate Roberts",  # Mantener nombre propio
-        "FBI": "FBI",
-        "DEA": "DEA",
-    }
-    
-    # Lista de traducciones línea por línea basadas en contexto
-    # Para casos específicos conocidos que requieren traducción precisa
-    specific_translations = {
-        "about the inner workings\nof the Silk Road and,": "sobre el funcionamiento interno\ndel Silk Road y,",
-        "you know, his own identity,\nof course.": "ya sabes, su propia identidad,\npor supuesto.",
-        "every law enforcement agency\nthat you can imagine.": "toda agencia de aplicación de la ley\nque puedas imaginar.",
-        "is a collaborative effort.": "es un esfuerzo colaborativo.",
-        "come from the community itself.": "vienen de la propia comunidad.",
-        "But he did tell me like\nsome interesting things": "Pero él sí me dijo como\nalgunas cosas interesantes",
-        "and the way that\nthe Silk Road works.": "y la forma en que\nfunciona el Silk Road.",
-        "of anything that's main purpose\nis to harm innocent": "de cualquier cosa cuyo propósito principal\nsea dañar inocentes",
-        "or that it was necessary": "o que fuera necesario",
-        "to harm innocent people\nto bring to market.": "dañar gente inocente\npara llevar al mercado.",
-    }
+    """Traduce texto específico del inglés al español (memoizado: los textos repetidos no se recalculan)"""
     
     # Buscar traducciones específicas primero
-    for eng, spa in specific_translations.items():
-        if eng.lower() in english_text.lower():
+    text_lower = english_text.lower()
+    for eng_lower, eng, spa in _SPECIFIC_TRANSLATIONS_LOWER:
+        if eng_lower in text_lower:
             return english_text.replace(eng, spa)
     
-    # Aplicar traducciones de términos comunes
-    spanish_text = english_text
-    for eng, spa in translations.items():
-        spanish_text = spanish_text.replace(eng, spa)
-    
-    # Traducciones generales por patrones
-    general_patterns = [
-        (r'\bthe\b', 'el/la'),  # Requiere contexto
-        (r'\band\b', 'y'),
-        (r'\bof\b', 'de'),
-        (r'\bto\b', 'a/para'),  # Requiere contexto
-        (r'\bthat\b', 'que/eso'),  # Requiere contexto
-        (r'\bis\b', 'es'),
-        (r'\bwas\b', 'era/estaba'),  # Requiere contexto
-        (r'\bwere\b', 'eran/estaban'),  # Requiere contexto
-        (r'\bwith\b', 'con'),
-        (r'\bfrom\b', 'desde/de'),
-        (r'\bthis\b', 'esto/este/esta'),
-        (r'\bin\b', 'en'),
-        (r'\bon\b', 'en/sobre'),
-        (r'\bat\b', 'en/a'),
-    ]
-    
     # NOTA: Para este caso específico, necesitaríamos traducciones más complejas
     # Por ahora retornamos el texto marcado para traducción manual
-    return f"[TRADUCIR]: {english_text}"
+    return f"{_PENDING_MARKER}{english_text}"
+
+async def _translate_remote(session, semaphore, english_text: str) -> Optional[str]:
+    """Traduce un texto con MyMemory; devuelve None si la petición falla o la respuesta no es usable"""
+    
+    async with semaphore:
+        try:
+            async with session.get(_MYMEMORY_URL, params={'q': english_text, 'langpair': 'en|es'}) as response:
+                data = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error traduciendo '{english_text[:30]}...': {e}")
+            return None
+    
+    if not isinstance(data, dict) or data.get('responseStatus') != 200:
+        details = data.get('responseDetails') if isinstance(data, dict) else data
+        print(f"MyMemory no tradujo '{english_text[:30]}...': {details}")
+        return None
+    
+    response_data = data.get('responseData')
+    translated = response_data.get('translatedText') if isinstance(response_data, dict) else None
+    if not isinstance(translated, str):
+        print(f"MyMemory devolvió una respuesta inesperada para '{english_text[:30]}...'")
+        return None
+    
+    # Una línea en blanco dentro del texto partiría el bloque SRT al escribirlo
+    translated = '\n'.join(line for line in translated.splitlines() if line.strip())
+    if not translated:
+        print(f"MyMemory devolvió una traducción vacía para '{english_text[:30]}...'")
+        return None
+    
+    return translated
+
+async def translate_many(texts: List[str]) -> List[str]:
+    """Traduce varios textos en paralelo vía MyMemory (las traducciones específicas locales tienen prioridad)"""
+    
+    pending = []
+    for text in dict.fromkeys(texts):
+        if text in _translation_cache:
+            continue
+        local = translate_text(text)
+        if local.startswith(_PENDING_MARKER) and aiohttp is not None:
+            pending.append(text)
+        else:
+            _translation_cache[text] = local
+    
+    if pending:
+        semaphore = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        timeout = aiohttp.ClientTimeout(total=30)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            results = await asyncio.gather(*(_translate_remote(session, semaphore, text) for text in pending))
+        # Solo se cachean las traducciones correctas: los fallos se reintentan en la siguiente llamada
+        _translation_cache.update((text, result) for text, result in zip(pending, results) if result is not None)
+    
+    # Lo que MyMemory no tradujo queda marcado para traducción manual
+    return [_translation_cache[text] if text in _translation_cache else translate_text(text) for text in texts]
 
 def append_translated_blocks(blocks_to_append: list):
     """Añade bloques traducidos al final de es.srt"""
     
-    with open('es.srt', 'a', encoding='utf-8') as f:
-        f.write('\n\n')  # Separador
-        
-        for i, (index, original_block) in enumerate(blocks_to_append):
-            lines = original_block.split('\n')
-            if len(lines) >= 3:
-                # Mantener índice y tiempos exactos
-                f.write(f"{lines[0]}\n")  # Índice
-                f.write(f"{lines[1]}\n")  # Tiempos
-                
-                # Traducir texto
-                text_lines = lines[2:]
-                text = '\n'.join(text_lines)
-                translated_text = translate_text(text)
-                f.write(f"{translated_text}\n")
-                
-                # Añadir separador entre subtítulos (excepto el último)
-                if i < len(blocks_to_append) - 1:
-                    f.write('\n')
-
-def main():
-    if len(sys.argv) != 3:
-        print("Uso: python3 controlled_translate.py <inicio> <fin>")
-        print("Ejemplo: python3 controlled_translate.py 211 220")
-        sys.exit(1)
+    # Extraer todos los textos y traducirlos en un solo lote concurrente
+    blocks = [original_block.split('\n') for _, original_block in blocks_to_append]
+    blocks = [lines for lines in blocks if len(lines) >= 3]
+    translations = asyncio.run(translate_many(['\n'.join(lines[2:]) for lines in blocks]))
     
-    start_idx = int(sys.argv[1])
-    end_idx = int(sys.argv[2])
+    # Construir todo el texto en memoria y escribirlo de una sola vez
+    # (manteniendo índice y tiempos exactos)
+    out = [
+        f"{lines[0]}\n{lines[1]}\n{translated_text}\n"
+        for lines, translated_text in zip(blocks, translations)
+    ]
+    
+    # Separador + bloques separados por línea en blanco, codificado una sola vez
+    data = ('\n\n' + '\n'.join(out)).encode('utf-8')
+    with open('es.srt', 'ab') as f:
+        f.write(data)
+
+def translate_range(start_idx: int, end_idx: int, en_file: Optional[SubFile] = None) -> Optional[bool]:
+    """Traduce (con preview y confirmación) los subtítulos start_idx-end_idx y los añade a es.srt.
+    Devuelve True si se añadieron, False si el usuario canceló y None si no hay subtítulos en el rango"""
     
     print(f"Extrayendo subtítulos {start_idx} a {end_idx} de en.srt...")
     
-    blocks = get_subtitle_block_from_en(start_idx, end_idx)
+    blocks = get_subtitle_block_from_en(start_idx, end_idx, en_file)
     
     if not blocks:
         print("No se encontraron subtítulos en ese rango")
-        sys.exit(1)
+        return None
     
     print(f"Encontrados {len(blocks)} subtítulos para traducir")
     
     # Mostrar preview
     print("\n--- PREVIEW DE LOS PRIMEROS 2 SUBTÍTULOS ---")
-    for i, (idx, block) in enumerate(blocks[:2]):
-        lines = block.split('\n')
-        text = '\n'.join(lines[2:])
-        translated = translate_text(text)
+    preview = [(idx, block.split('\n')) for idx, block in blocks[:2]]
+    preview_texts = ['\n'.join(lines[2:]) for _, lines in preview]
+    for (idx, lines), text, translated in zip(preview, preview_texts, asyncio.run(translate_many(preview_texts))):
         print(f"#{idx}: {lines[1]}")
         print(f"EN: {text[:50]}...")
         print(f"ES: {translated[:50]}...")
@@ -157,12 +171,28 @@ def main():
     response = input(f"¿Continuar con la traducción de {len(blocks)} subtítulos? (s/N): ")
     if response.lower() != 's':
         print("Cancelado por el usuario")
-        sys.exit(0)
+        return False
     
     print("Añadiendo traducciones a es.srt...")
     append_translated_blocks(blocks)
     
     print(f"✅ Completado: añadidos {len(blocks)} subtítulos ({start_idx}-{end_idx})")
+    return True
+
+def main():
+    if len(sys.argv) != 3:
+        print("Uso: python3 controlled_translate.py <inicio> <fin>")
+        print("Ejemplo: python3 controlled_translate.py 211 220")
+        sys.exit(1)
+    
+    start_idx = int(sys.argv[1])
+    end_idx = int(sys.argv[2])
+    
+    result = translate_range(start_idx, end_idx)
+    if result is None:
+        sys.exit(1)
+    if not result:
+        sys.exit(0)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
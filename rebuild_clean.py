@@ -3,74 +3,37 @@
 Script para reconstruir es.srt con solo los primeros 210 subtítulos correctos
 """
 
-import re
+from functools import lru_cache
+
+from srt_cache import SubFile, iter_srt, load_file
 
 def extract_first_n_subtitles(filename: str, n: int, output_filename: str):
     """Extrae los primeros n subtítulos de un archivo SRT"""
     
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-    
-    # Remover BOM si existe
-    if content.startswith('\ufeff'):
-        content = content[1:]
-    
-    blocks = content.split('\n\n')
+    # Lectura en streaming: se deja de leer el archivo al pasar del subtítulo n
     good_blocks = []
+    for sub in iter_srt(filename):
+        if sub.index > n:
+            break
+        good_blocks.append(sub.to_block())
     
-    for block in blocks:
-        if not block.strip():
-            continue
-            
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
-            
-        try:
-            index = int(lines[0])
-            if index <= n:
-                good_blocks.append(block.strip())
-            else:
-                break
-        except ValueError:
-            continue
-    
-    # Escribir archivo limpio
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(good_blocks))
-        if good_blocks:
-            f.write('\n')
+    # Escribir archivo limpio: codificar una vez y una sola escritura binaria
+    data = ('\n\n'.join(good_blocks) + ('\n' if good_blocks else '')).encode('utf-8')
+    with open(output_filename, 'wb') as f:
+        f.write(data)
     
     print(f"Extraídos {len(good_blocks)} subtítulos a {output_filename}")
     return len(good_blocks)
 
+@lru_cache(maxsize=None)
+def _sub_file(filename: str) -> SubFile:
+    """Carga e indexa un archivo SRT una sola vez por ejecución"""
+    return load_file(filename)
+
 def get_subtitle_block(filename: str, index: int) -> str:
     """Obtiene un bloque específico de subtítulo por índice"""
-    
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-    
-    if content.startswith('\ufeff'):
-        content = content[1:]
-    
-    blocks = content.split('\n\n')
-    
-    for block in blocks:
-        if not block.strip():
-            continue
-            
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
-            
-        try:
-            block_index = int(lines[0])
-            if block_index == index:
-                return block.strip()
-        except ValueError:
-            continue
-    
-    return None
+    sub = _sub_file(filename).by_index.get(index)
+    return sub.to_block() if sub else None
 
 def main():
     print("Creando archivo es.srt limpio con los primeros 210 subtítulos...")
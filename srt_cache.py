@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Módulo compartido para parsear archivos SRT una sola vez y cachear el resultado
+"""
+
+import os
+import re
+import pickle
+from typing import Dict, Iterator, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+# Bloque SRT completo: índice, línea de tiempos y líneas de texto hasta la
+# siguiente línea en blanco (o el final del archivo). Cada línea de texto debe
+# tener algún carácter visible, así el regex no necesita lookahead por línea
+_BLOCK_RE = re.compile(
+    r'^[ \t]*(\d+)[ \t]*\n'
+    r'[ \t]*((\d+):(\d\d):(\d\d),(\d\d\d))[ \t]*-->[ \t]*([^\n]*?)[ \t]*\n'
+    r'([^\n]*\S[^\n]*(?:\n[^\n]*\S[^\n]*)*)',
+    re.MULTILINE
+)
+
+# Incrementar si cambia el formato de Subtitle o del parser para invalidar los .pkl
+_CACHE_VERSION = 2
+
+@dataclass(slots=True, frozen=True)
+class Subtitle:
+    index: int
+    start_time: str
+    end_time: str
+    text: str
+    timestamp_ms: int  # para comparación
+
+    def to_block(self) -> str:
+        """Reconstruye el bloque SRT (sin línea en blanco final)"""
+        return f"{self.index}\n{self.start_time} --> {self.end_time}\n{self.text}"
+
+def _iter_blocks(content: str) -> Iterator[Subtitle]:
+    """Devuelve un Subtitle por cada bloque que encaja con _BLOCK_RE (los mal formados se omiten)"""
+    for m in _BLOCK_RE.finditer(content):
+        yield Subtitle(
+            index=int(m[1]),
+            start_time=m[2],
+            end_time=m[7],
+            text=m[8].rstrip(),
+            timestamp_ms=int(m[3]) * 3600000 + int(m[4]) * 60000 + int(m[5]) * 1000 + int(m[6])
+        )
+
+def iter_srt(filename: str) -> Iterator[Subtitle]:
+    """Recorre un archivo SRT línea a línea devolviendo un Subtitle por bloque"""
+    # utf-8-sig elimina el BOM (si existe) al decodificar
+    with open(filename, 'r', encoding='utf-8-sig') as f:
+        block = []
+        for line in f:
+            if not line.isspace():
+                block.append(line)
+                continue
+            
+            if block:
+                # Mismo regex que parse_srt_file: ambos parsers aceptan los mismos bloques
+                yield from _iter_blocks(''.join(block))
+                block = []
+        
+        if block:
+            yield from _iter_blocks(''.join(block))
+
+def iter_srt_range(filename: str, lo: int, hi: int) -> Iterator[Subtitle]:
+    """Como iter_srt, pero solo devuelve los índices lo-hi y deja de leer al pasar de hi"""
+    for sub in iter_srt(filename):
+        if sub.index > hi:
+            break
+        if sub.index >= lo:
+            yield sub
+
+def parse_srt_file(filename: str) -> List[Subtitle]:
+    """Parse archivo SRT completo con una sola expresión regular y devuelve lista de subtítulos"""
+    with open(filename, 'r', encoding='utf-8-sig') as f:
+        content = f.read()
+
+    return list(_iter_blocks(content))
+
+def to_arrays(subs: List[Subtitle]) -> Tuple[np.ndarray, np.ndarray]:
+    """Devuelve (índices, timestamps_ms) de los subtítulos como arrays NumPy"""
+    indexes = np.fromiter((sub.index for sub in subs), dtype=np.int64, count=len(subs))
+    timestamps = np.fromiter((sub.timestamp_ms for sub in subs), dtype=np.int64, count=len(subs))
+    return indexes, timestamps
+
+@dataclass
+class SubFile:
+    """Subtítulos de un archivo junto con sus índices derivados (se construyen una sola vez)"""
+    subs: List[Subtitle]
+    by_index: Dict[int, Subtitle]
+    indexes: np.ndarray
+    timestamps_ms: np.ndarray
+    max_index: int  # 0 si el archivo está vacío
+
+    @classmethod
+    def from_subs(cls, subs: List[Subtitle]) -> 'SubFile':
+        indexes, timestamps_ms = to_arrays(subs)
+        return cls(
+            subs=subs,
+            by_index={sub.index: sub for sub in subs},
+            indexes=indexes,
+            timestamps_ms=timestamps_ms,
+            max_index=int(indexes.max()) if subs else 0
+        )
+
+    def __len__(self) -> int:
+        return len(self.subs)
+
+    @cached_property
+    def time_order(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(orden, timestamps ordenados), calculado una sola vez; el orden es estable
+        para conservar el orden del archivo entre subtítulos con el mismo tiempo"""
+        order = np.argsort(self.timestamps_ms, kind='stable')
+        return order, self.timestamps_ms[order]
+
+    def timestamps_by_index(self, lo: int, hi: int) -> np.ndarray:
+        """Array con el timestamp de cada índice lo-hi (posición i = índice lo + i, -1 si falta)"""
+        in_range = (self.indexes >= lo) & (self.indexes <= hi)
+
+        by_index = np.full(max(hi - lo + 1, 0), -1, dtype=np.int64)
+        by_index[self.indexes[in_range] - lo] = self.timestamps_ms[in_range]
+        return by_index
+
+def _read_cache(cache_filename: str, mtime_ns: int) -> Optional[List[Subtitle]]:
+    """Devuelve los subtítulos cacheados si el .pkl corresponde al mtime actual"""
+    try:
+        with open(cache_filename, 'rb') as f:
+            version, cached_mtime_ns, subtitles = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+        return None
+
+    if version != _CACHE_VERSION or cached_mtime_ns != mtime_ns:
+        return None
+
+    return subtitles
+
+def load_subs(filename: str) -> List[Subtitle]:
+    """Carga subtítulos desde el caché <filename>.pkl o parsea y regenera el caché"""
+    mtime_ns = os.stat(filename).st_mtime_ns
+    cache_filename = f"{filename}.pkl"
+
+    subtitles = _read_cache(cache_filename, mtime_ns)
+    if subtitles is not None:
+        return subtitles
+
+    subtitles = parse_srt_file(filename)
+
+    # El caché es opcional: si no se puede escribir seguimos sin él
+    try:
+        with open(cache_filename, 'wb') as f:
+            pickle.dump((_CACHE_VERSION, mtime_ns, subtitles), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+
+    return subtitles
+
+def load_file(filename: str) -> SubFile:
+    """Carga un archivo SRT (vía caché) como SubFile"""
+    return SubFile.from_subs(load_subs(filename))
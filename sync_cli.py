@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Punto de entrada único: parsea en.srt y es.srt una sola vez y ejecuta los análisis pedidos
+"""
+
+import argparse
+import logging
+
+from srt_cache import load_file
+from find_good_sync import report_last_good_sync
+from verify_sync_range import verify_default_ranges
+from sync_repair import analyze_sync
+from controlled_translate import translate_range
+
+# Análisis que reciben (en_file, es_file) ya cargados
+ANALYSES = {
+    'find-good': report_last_good_sync,
+    'verify': verify_default_ranges,
+    'repair': analyze_sync,
+}
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Analiza y repara la sincronización entre en.srt y es.srt con un solo parseo"
+    )
+    parser.add_argument(
+        'commands', nargs='*', metavar='PASO',
+        help="pasos a ejecutar en orden: find-good, verify, repair, translate (por defecto: find-good verify repair)"
+    )
+    parser.add_argument(
+        '--rango', nargs=2, type=int, metavar=('INICIO', 'FIN'),
+        help="rango de subtítulos para el paso translate"
+    )
+    parser.add_argument(
+        '-v', '--verbose', action='store_true',
+        help="muestra también el progreso detallado"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+
+    # argparse (3.11) rechaza la lista vacía si se usa choices con nargs='*'
+    commands = args.commands or list(ANALYSES)
+    for command in commands:
+        if command not in ANALYSES and command != 'translate':
+            parser.error(f"paso desconocido: {command}")
+    if 'translate' in commands and not args.rango:
+        parser.error("el paso translate requiere --rango INICIO FIN")
+
+    try:
+        en_file = load_file('en.srt')
+        es_file = load_file('es.srt')
+    except Exception as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"Cargados: {len(en_file)} subtítulos EN, {len(es_file)} subtítulos ES")
+
+    for command in commands:
+        print(f"\n##### {command} #####")
+        if command == 'translate':
+            # translate añade bloques a es.srt: recargar solo si se añadió algo
+            if translate_range(*args.rango, en_file=en_file):
+                es_file = load_file('es.srt')
+        else:
+            ANALYSES[command](en_file, es_file)
+
+if __name__ == "__main__":
+    main()
@@ -3,74 +3,24 @@
 Script para analizar y reparar la sincronización entre archivos SRT en.srt y es.srt
 """
 
-import re
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, Tuple
 
-@dataclass
-class Subtitle:
-    index: int
-    start_time: str
-    end_time: str
-    text: str
-    timestamp_ms: int  # para comparación
+import numpy as np
 
-def parse_timestamp(time_str: str) -> int:
-    """Convierte timestamp SRT a milisegundos"""
-    # Formato: HH:MM:SS,mmm
-    parts = time_str.replace(',', ':').split(':')
-    hours, minutes, seconds, ms = map(int, parts)
-    return ((hours * 3600 + minutes * 60 + seconds) * 1000) + ms
+from srt_cache import SubFile, load_file
 
-def parse_srt_file(filename: str) -> List[Subtitle]:
-    """Parse archivo SRT y devuelve lista de subtítulos"""
-    subtitles = []
-    
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-    
-    # Remover BOM si existe
-    if content.startswith('\ufeff'):
-        content = content[1:]
-    
-    blocks = content.split('\n\n')
-    
-    for block in blocks:
-        if not block.strip():
-            continue
-            
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
-            
-        try:
-            index = int(lines[0])
-            time_line = lines[1]
-            text_lines = lines[2:]
-            
-            # Parse tiempos
-            if '-->' not in time_line:
-                continue
-                
-            start_time, end_time = time_line.split(' --> ')
-            start_ms = parse_timestamp(start_time.strip())
-            
-            text = '\n'.join(text_lines)
-            
-            subtitles.append(Subtitle(
-                index=index,
-                start_time=start_time.strip(),
-                end_time=end_time.strip(), 
-                text=text,
-                timestamp_ms=start_ms
-            ))
-        except (ValueError, IndexError) as e:
-            print(f"Error parseando bloque: {block[:50]}... - {e}")
-            continue
-    
-    return subtitles
+def find_nearest(times_sorted: np.ndarray, timestamps_ms: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Para cada timestamp devuelve la posición (en times_sorted) del primer subtítulo con
+    el tiempo más cercano y la diferencia en ms; en empate gana el tiempo anterior"""
+    last = times_sorted.size - 1
+    pos = np.searchsorted(times_sorted, timestamps_ms)
+    left = times_sorted[np.clip(pos - 1, 0, last)]
+    right = times_sorted[np.clip(pos, 0, last)]
+    
+    best = np.where(np.abs(right - timestamps_ms) < np.abs(left - timestamps_ms), right, left)
+    return np.searchsorted(times_sorted, best), np.abs(best - timestamps_ms)
 
-def find_sync_issues(en_subs: List[Subtitle], es_subs: List[Subtitle]) -> Dict:
+def find_sync_issues(en_file: SubFile, es_file: SubFile) -> Dict:
     """Encuentra problemas de sincronización"""
     issues = {
         'missing_in_es': [],
@@ -79,44 +29,35 @@ def find_sync_issues(en_subs: List[Subtitle], es_subs: List[Subtitle]) -> Dict:
         'index_mismatches': []
     }
     
-    # Crear mapas por tiempo
-    es_by_time = {}
-    for es_sub in es_subs:
-        time_key = es_sub.timestamp_ms
-        if time_key not in es_by_time:
-            es_by_time[time_key] = []
-        es_by_time[time_key].append(es_sub)
-    
-    print(f"Analizando {len(en_subs)} subtítulos en inglés vs {len(es_subs)} en español")
-    
-    # Verificar cada subtítulo en inglés
-    for en_sub in en_subs:
-        # Buscar coincidencia exacta por tiempo
-        exact_match = es_by_time.get(en_sub.timestamp_ms, [])
-        
-        if not exact_match:
-            # Buscar coincidencia cercana (±500ms)
-            close_matches = []
-            for es_time, es_list in es_by_time.items():
-                if abs(es_time - en_sub.timestamp_ms) <= 500:
-                    close_matches.extend(es_list)
-            
-            if not close_matches:
-                issues['missing_in_es'].append(en_sub)
-            else:
-                # Hay coincidencias cercanas pero no exactas
-                best_match = min(close_matches, key=lambda x: abs(x.timestamp_ms - en_sub.timestamp_ms))
-                if abs(best_match.timestamp_ms - en_sub.timestamp_ms) > 200:
-                    issues['time_drifts'].append((en_sub, best_match))
-        else:
-            # Hay coincidencia exacta - verificar si hay duplicados
-            if len(exact_match) > 1:
-                issues['duplicates_in_es'].extend(exact_match[1:])
-            
-            # Verificar si el índice coincide
-            es_match = exact_match[0]
-            if en_sub.index != es_match.index:
-                issues['index_mismatches'].append((en_sub, es_match))
+    print(f"Analizando {len(en_file)} subtítulos en inglés vs {len(es_file)} en español")
+    
+    if not es_file.subs:
+        issues['missing_in_es'] = list(en_file.subs)
+        return issues
+    
+    # Subtítulo español más cercano en tiempo a cada subtítulo en inglés
+    es_order, es_times_sorted = es_file.time_order
+    en_ts = en_file.timestamps_ms
+    first, diff = find_nearest(es_times_sorted, en_ts)
+    best = es_order[first]  # posición en es_file.subs
+    
+    exact = diff == 0
+    missing = diff > 500  # Sin coincidencia cercana (±500ms)
+    drift = (diff > 200) & ~missing
+    mismatch = exact & (en_file.indexes != es_file.indexes[best])
+    
+    # Coincidencias exactas con más de un subtítulo español en el mismo tiempo
+    group_end = np.searchsorted(es_times_sorted, en_ts, side='right')
+    duplicated = exact & (group_end - first > 1)
+    
+    # Materializar subtítulos solo para los problemas encontrados
+    en_subs = en_file.subs
+    es_subs = es_file.subs
+    issues['missing_in_es'] = [en_subs[i] for i in np.flatnonzero(missing).tolist()]
+    issues['time_drifts'] = [(en_subs[i], es_subs[best[i]]) for i in np.flatnonzero(drift).tolist()]
+    issues['index_mismatches'] = [(en_subs[i], es_subs[best[i]]) for i in np.flatnonzero(mismatch).tolist()]
+    for i in np.flatnonzero(duplicated).tolist():
+        issues['duplicates_in_es'].extend(es_subs[j] for j in es_order[first[i] + 1:group_end[i]].tolist())
     
     return issues
 
@@ -144,13 +85,39 @@ def print_analysis(issues: Dict):
             drift_ms = abs(en_sub.timestamp_ms - es_sub.timestamp_ms)
             print(f"EN #{en_sub.index} ({en_sub.start_time}) vs ES #{es_sub.index} ({es_sub.start_time}) - Diferencia: {drift_ms}ms")
 
+def analyze_sync(en_file: SubFile, es_file: SubFile):
+    """Analiza problemas de sincronización y revisa el área problemática 830-850"""
+    
+    # Encontrar problemas
+    issues = find_sync_issues(en_file, es_file)
+    
+    # Imprimir análisis
+    print_analysis(issues)
+    
+    # Verificar punto específico de ruptura alrededor del #838
+    print(f"\n=== VERIFICANDO ÁREA PROBLEMÁTICA (subtítulos 830-850) ===")
+    area = [en_file.by_index[idx] for idx in range(830, 851) if idx in en_file.by_index]
+    if area and es_file.subs:
+        es_order, es_times_sorted = es_file.time_order
+        first, diff = find_nearest(es_times_sorted, np.array([sub.timestamp_ms for sub in area], dtype=np.int64))
+        matches = [es_file.subs[es_order[f]] if d <= 100 else None for f, d in zip(first.tolist(), diff.tolist())]
+    else:
+        matches = [None] * len(area)
+    
+    for en_sub, es_match in zip(area, matches):
+        if es_match:
+            sync_status = "✓" if en_sub.index == es_match.index else f"DESYNC (ES #{es_match.index})"
+            print(f"EN #{en_sub.index} -> ES #{es_match.index} {sync_status}")
+        else:
+            print(f"EN #{en_sub.index} -> FALTA EN ESPAÑOL")
+
 def main():
     print("Analizando sincronización entre en.srt y es.srt...")
     
     # Parse archivos
     try:
-        en_subs = parse_srt_file('en.srt')
-        es_subs = parse_srt_file('es.srt')
+        en_file = load_file('en.srt')
+        es_file = load_file('es.srt')
     except FileNotFoundError as e:
         print(f"Error: No se pudo encontrar archivo: {e}")
         return
@@ -159,34 +126,13 @@ def main():
         return
     
     # Verificar que se parsearon correctamente
-    if not en_subs or not es_subs:
+    if not en_file.subs or not es_file.subs:
         print("Error: No se pudieron parsear los archivos SRT")
         return
     
-    print(f"Parseados: {len(en_subs)} subtítulos en inglés, {len(es_subs)} en español")
-    
-    # Encontrar problemas
-    issues = find_sync_issues(en_subs, es_subs)
+    print(f"Parseados: {len(en_file)} subtítulos en inglés, {len(es_file)} en español")
     
-    # Imprimir análisis
-    print_analysis(issues)
-    
-    # Verificar punto específico de ruptura alrededor del #838
-    print(f"\n=== VERIFICANDO ÁREA PROBLEMÁTICA (subtítulos 830-850) ===")
-    for en_sub in en_subs:
-        if 830 <= en_sub.index <= 850:
-            # Buscar corresponsal español
-            es_match = None
-            for es_sub in es_subs:
-                if abs(es_sub.timestamp_ms - en_sub.timestamp_ms) <= 100:
-                    es_match = es_sub
-                    break
-            
-            if es_match:
-                sync_status = "✓" if en_sub.index == es_match.index else f"DESYNC (ES #{es_match.index})"
-                print(f"EN #{en_sub.index} -> ES #{es_match.index if es_match else 'FALTA'} {sync_status}")
-            else:
-                print(f"EN #{en_sub.index} -> FALTA EN ESPAÑOL")
+    analyze_sync(en_file, es_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
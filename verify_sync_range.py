@@ -3,112 +3,66 @@
 Script para verificar sincronización específicamente en un rango de subtítulos
 """
 
-import re
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Tuple
 
-@dataclass
-class Subtitle:
-    index: int
-    start_time: str
-    end_time: str
-    text: str
-    timestamp_ms: int
+import numpy as np
 
-def parse_timestamp(time_str: str) -> int:
-    """Convierte timestamp SRT a milisegundos"""
-    parts = time_str.replace(',', ':').split(':')
-    hours, minutes, seconds, ms = map(int, parts)
-    return ((hours * 3600 + minutes * 60 + seconds) * 1000) + ms
+from srt_cache import SubFile, iter_srt, iter_srt_range
 
-def parse_srt_file(filename: str) -> List[Subtitle]:
-    """Parse archivo SRT y devuelve lista de subtítulos"""
-    subtitles = []
-    
-    with open(filename, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-    
-    if content.startswith('\ufeff'):
-        content = content[1:]
-    
-    blocks = content.split('\n\n')
-    
-    for block in blocks:
-        if not block.strip():
-            continue
-            
-        lines = block.strip().split('\n')
-        if len(lines) < 3:
-            continue
-            
-        try:
-            index = int(lines[0])
-            time_line = lines[1]
-            text_lines = lines[2:]
-            
-            if '-->' not in time_line:
-                continue
-                
-            start_time, end_time = time_line.split(' --> ')
-            start_ms = parse_timestamp(start_time.strip())
-            
-            text = '\n'.join(text_lines)
-            
-            subtitles.append(Subtitle(
-                index=index,
-                start_time=start_time.strip(),
-                end_time=end_time.strip(), 
-                text=text,
-                timestamp_ms=start_ms
-            ))
-        except (ValueError, IndexError) as e:
-            print(f"Error parsing subtitle: {e}")
-            continue
-    
-    return subtitles
-
-def verify_range_sync(en_subs: List[Subtitle], es_subs: List[Subtitle], start_range: int, end_range: int):
+def verify_range_sync(en_file: SubFile, es_file: SubFile, start_range: int, end_range: int):
     """Verifica sincronización en un rango específico"""
     
-    # Crear mapas por índice
-    en_by_index = {sub.index: sub for sub in en_subs}
-    es_by_index = {sub.index: sub for sub in es_subs}
+    # Mapas por índice (ya construidos al cargar)
+    en_by_index = en_file.by_index
+    es_by_index = es_file.by_index
     
     print(f"\n=== VERIFICANDO SINCRONIZACIÓN RANGO {start_range}-{end_range} ===")
     
     errors = []
     warnings = []
-    good_count = 0
     
-    for i in range(start_range, end_range + 1):
-        en_sub = en_by_index.get(i)
-        es_sub = es_by_index.get(i)
+    # Timestamps alineados por índice solo para el rango (-1 si falta); en es.srt
+    # se incluye el índice anterior al rango para verificar el orden cronológico
+    en_ts = en_file.timestamps_by_index(start_range, end_range)
+    es_window = es_file.timestamps_by_index(start_range - 1, end_range)
+    es_ts = es_window[1:]
+    prev_es_ts = es_window[:-1]
+    
+    both = (en_ts >= 0) & (es_ts >= 0)
+    diff = np.abs(en_ts - es_ts)
+    
+    # Verificar que los tiempos coincidan (tolerancia de 100ms para exactitud)
+    desync = both & (diff > 100)
+    small_drift = both & (diff > 50) & (diff <= 100)
+    good_count = int(np.count_nonzero(both & (diff <= 50)))
+    
+    # Verificar orden cronológico (el primero del rango no se compara)
+    out_of_order = both & (prev_es_ts >= 0) & (es_ts < prev_es_ts)
+    out_of_order[:1] = False
+    
+    # Solo se recorren en Python los subtítulos con algo que reportar
+    for offset in np.flatnonzero(~both | desync | small_drift | out_of_order).tolist():
+        i = start_range + offset
         
-        if not en_sub:
+        if en_ts[offset] < 0:
             errors.append(f"#{i}: FALTA EN INGLÉS")
             continue
             
-        if not es_sub:
+        if es_ts[offset] < 0:
             errors.append(f"#{i}: FALTA EN ESPAÑOL")
             continue
         
-        # Verificar que los tiempos coincidan (tolerancia de 100ms para exactitud)
-        time_diff = abs(en_sub.timestamp_ms - es_sub.timestamp_ms)
-        
-        if time_diff > 100:
-            errors.append(f"#{i}: DESYNC - Diferencia: {time_diff}ms")
+        if desync[offset]:
+            en_sub = en_by_index[i]
+            es_sub = es_by_index[i]
+            errors.append(f"#{i}: DESYNC - Diferencia: {diff[offset]}ms")
             print(f"    EN: {en_sub.start_time} - {en_sub.text[:40]}...")
             print(f"    ES: {es_sub.start_time} - {es_sub.text[:40]}...")
-        elif time_diff > 50:
-            warnings.append(f"#{i}: Pequeña desviación: {time_diff}ms")
-        else:
-            good_count += 1
+        elif small_drift[offset]:
+            warnings.append(f"#{i}: Pequeña desviación: {diff[offset]}ms")
             
-        # Verificar orden cronológico
-        if i > start_range:
-            prev_es = es_by_index.get(i-1)
-            if prev_es and es_sub.timestamp_ms < prev_es.timestamp_ms:
-                errors.append(f"#{i}: ORDEN CRONOLÓGICO INCORRECTO - tiempo anterior al previo")
+        if out_of_order[offset]:
+            errors.append(f"#{i}: ORDEN CRONOLÓGICO INCORRECTO - tiempo anterior al previo")
     
     # Reporte
     total_checked = end_range - start_range + 1
@@ -143,20 +97,11 @@ def verify_range_sync(en_subs: List[Subtitle], es_subs: List[Subtitle], start_ra
     
     return len(errors) == 0
 
-def main():
-    print("Verificando sincronización en rango específico...")
-    
-    try:
-        en_subs = parse_srt_file('en.srt')
-        es_subs = parse_srt_file('es.srt')
-    except Exception as e:
-        print(f"Error: {e}")
-        return
-    
-    print(f"Cargados: {len(en_subs)} subtítulos EN, {len(es_subs)} subtítulos ES")
+def verify_default_ranges(en_file: SubFile, es_file: SubFile):
+    """Verifica el rango 400-800 y los últimos 10 subtítulos de es.srt"""
     
     # Verificar rango 400-800 como pidió el usuario
-    is_good = verify_range_sync(en_subs, es_subs, 400, 800)
+    is_good = verify_range_sync(en_file, es_file, 400, 800)
     
     if is_good:
         print("\n🎉 RESULTADO: Sincronización CORRECTA en el rango verificado")
@@ -164,13 +109,56 @@ def main():
         print("\n⚠️  RESULTADO: Se encontraron problemas de sincronización")
     
     # También verificar el final actual del archivo español
-    max_es_index = max(sub.index for sub in es_subs) if es_subs else 0
+    max_es_index = es_file.max_index
     print(f"\nÚltimo subtítulo en es.srt: #{max_es_index}")
     
     # Verificar los últimos 10 subtítulos para asegurar continuidad
     if max_es_index >= 10:
         print(f"\nVerificando últimos 10 subtítulos ({max_es_index-9} a {max_es_index}):")
-        verify_range_sync(en_subs, es_subs, max_es_index-9, max_es_index)
+        verify_range_sync(en_file, es_file, max_es_index-9, max_es_index)
+
+def load_verification_ranges(start_range: int, end_range: int, tail: int = 10) -> Tuple[SubFile, SubFile]:
+    """Carga solo los subtítulos que verify_default_ranges necesita: el rango
+    start_range-end_range y los `tail` índices más altos de es.srt (más sus pares en en.srt)"""
+    
+    # es.srt: una sola pasada guardando el rango y los índices más altos vistos.
+    # es.srt puede tener bloques añadidos fuera de orden, así que el final se
+    # calcula por índice y no por posición en el archivo
+    es_subs = []
+    es_tail = {}
+    max_es_index = 0
+    for sub in iter_srt('es.srt'):
+        if start_range <= sub.index <= end_range:
+            es_subs.append(sub)
+        if sub.index > max_es_index:
+            max_es_index = sub.index
+            es_tail = {index: tail_sub for index, tail_sub in es_tail.items() if index > max_es_index - tail}
+        if sub.index > max_es_index - tail:
+            es_tail[sub.index] = sub  # como en by_index, gana la última aparición
+    
+    tail_start = max_es_index - tail + 1
+    es_subs.extend(sub for sub in es_tail.values() if not start_range <= sub.index <= end_range)
+    
+    # en.srt: se deja de leer al pasar del último índice necesario
+    en_subs = [
+        sub for sub in iter_srt_range('en.srt', min(start_range, tail_start), max(end_range, max_es_index))
+        if start_range <= sub.index <= end_range or tail_start <= sub.index <= max_es_index
+    ]
+    
+    return SubFile.from_subs(en_subs), SubFile.from_subs(es_subs)
+
+def main():
+    print("Verificando sincronización en rango específico...")
+    
+    try:
+        en_file, es_file = load_verification_ranges(400, 800)
+    except Exception as e:
+        print(f"Error: {e}")
+        return
+    
+    print(f"Cargados: {len(en_file)} subtítulos EN, {len(es_file)} subtítulos ES (solo los rangos a verificar)")
+    
+    verify_default_ranges(en_file, es_file)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file